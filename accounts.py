@@ -0,0 +1,87 @@
+import json
+import os
+
+# Deye credentials per Alexa user.
+#
+# Multi-tenant deployments map the Alexa userId (context.System.user.userId)
+# to Deye credentials in a JSON document, from the file at DEYE_ACCOUNTS_FILE
+# or inline in DEYE_ACCOUNTS:
+#
+#     {"amzn1.ask.account.XXX": {"email": "...", "password_hash": "...", "station_id": 12345}}
+#
+# Without such a mapping the skill is single-tenant and every user gets the
+# account from DEYE_EMAIL / DEYE_PASSWORD_HASH / DEYE_STATION_ID.
+#
+# The mapping is maintained by the operator; there is no Alexa account
+# linking. Alexa issues a new userId when a user disables and re-enables the
+# skill, so such users need their new userId added again.
+
+accounts_cache = {
+    'source': None,
+    'accounts': None
+}
+
+
+def load_accounts():
+    """
+    Return the userId -> credentials mapping, or None for single-tenant mode.
+    The mapping is read once per container (and again if its source changes).
+    """
+    path = os.environ.get('DEYE_ACCOUNTS_FILE')
+    inline = os.environ.get('DEYE_ACCOUNTS')
+    source = path or inline
+    if not source:
+        return None
+
+    if accounts_cache['source'] != source:
+        if path:
+            with open(path) as accounts_file:
+                accounts = json.load(accounts_file)
+        else:
+            accounts = json.loads(inline)
+        accounts_cache['accounts'] = accounts
+        accounts_cache['source'] = source
+        print(f"Loaded {len(accounts)} account(s)")
+    return accounts_cache['accounts']
+
+
+def default_account():
+    """The single-tenant account from environment variables, or None if not configured"""
+    if not os.environ.get('DEYE_EMAIL'):
+        return None
+    return {
+        'key': 'default',
+        'email': os.environ.get('DEYE_EMAIL'),
+        'password_hash': os.environ.get('DEYE_PASSWORD_HASH'),
+        'station_id': os.environ.get('DEYE_STATION_ID')
+    }
+
+
+def get_user_id(event):
+    """The Alexa userId of the request, or None"""
+    return event.get('context', {}).get('System', {}).get('user', {}).get('userId')
+
+
+def get_account(event):
+    """
+    Credentials for the user making the request, or None if the user has
+    no Deye account configured
+    """
+    return get_user_account(get_user_id(event))
+
+
+def get_user_account(user_id):
+    """Credentials for an Alexa userId, or None if the user has no Deye account configured"""
+    accounts = load_accounts()
+    if accounts is None:
+        return default_account()
+
+    credentials = accounts.get(user_id) if user_id else None
+    if not credentials:
+        return None
+    return {
+        'key': user_id,
+        'email': credentials['email'],
+        'password_hash': credentials['password_hash'],
+        'station_id': credentials.get('station_id')
+    }
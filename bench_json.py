@@ -0,0 +1,113 @@
+import json
+import random
+import time
+import timeit
+
+import lambda_function
+from lambda_function import decode_json, extract_station_snapshot, build_battery_response
+
+# Benchmark the station/latest decode path and the response encoding that
+# the Lambda runtime performs on our return value.
+# Run with: python bench_json.py > bench_output.txt
+
+ROUNDS = 2000
+
+
+def make_station_payload(extra_fields, nested_items=0):
+    """Build a station/latest body shaped like the Deye response, padded with extra fields"""
+    payload = {
+        'code': '1000000',
+        'msg': 'success',
+        'success': True,
+        'requestId': 'a1b2c3d4e5f60718293a4b5c6d7e8f90',
+        'generationPower': 3120.0,
+        'consumptionPower': 2704.5,
+        'gridPower': 12.0,
+        'purchasePower': 12.0,
+        'wirePower': 0.0,
+        'chargePower': None,
+        'dischargePower': 420.0,
+        'batteryPower': -420.0,
+        'batterySoc': 87.0,
+        'irradiateIntensity': None,
+        'lastUpdateTime': int(time.time()),
+    }
+    rng = random.Random(42)
+    for i in range(extra_fields):
+        payload[f'extraMetric{i}'] = round(rng.uniform(0, 10000), 2)
+    if nested_items:
+        payload['dataItems'] = [
+            {f'metric{j}': round(rng.uniform(0, 100), 2) for j in range(30)} for _ in range(nested_items)
+        ]
+    return json.dumps(payload).encode()
+
+
+def old_decode(raw):
+    """Previous path: full stdlib decode plus repr of the whole body for logging"""
+    result = json.loads(raw)
+    repr(result)
+    return int(result.get('batterySoc') or 0)
+
+
+def new_decode(raw):
+    """Current path: backend decode and schema extraction only"""
+    return extract_station_snapshot(decode_json(raw))['battery_percent']
+
+
+def stdlib_decode(raw):
+    """Current path on the stdlib fallback (no orjson installed)"""
+    return extract_station_snapshot(json.loads(raw))['battery_percent']
+
+
+# Rejected alternative: a hook that drops every key the schema doesn't need
+# while decoding. On flat bodies it ties with a plain stdlib decode; once the
+# body has nested objects, building each object's pairs in Python costs more
+# than it saves, and it never approaches orjson.
+SELECTED_KEYS = {'code', 'success', 'msg'}.union(*lambda_function.STATION_FIELDS.values())
+selective_decoder = json.JSONDecoder(
+    object_pairs_hook=lambda pairs: {key: value for key, value in pairs if key in SELECTED_KEYS}
+)
+
+
+def selective_decode(raw):
+    """Stdlib decode keeping only the schema's keys"""
+    return extract_station_snapshot(selective_decoder.decode(raw.decode()))['battery_percent']
+
+
+def bench(label, fn):
+    seconds = timeit.timeit(fn, number=ROUNDS)
+    print(f"   {label:<28} {seconds / ROUNDS * 1e6:10.1f} µs/op")
+
+
+print("=" * 60)
+print("⏱️  JSON decode / encode benchmark")
+print("=" * 60)
+print(f"\n🔧 Backend: {'orjson' if lambda_function.orjson is not None else 'stdlib json'}")
+
+for label, extra, nested in (('typical', 0, 0), ('verbose', 400, 0), ('huge', 3000, 0), ('nested', 400, 200)):
+    raw = make_station_payload(extra, nested)
+    print(f"\n📦 station/latest {label}: {len(raw)} bytes")
+    bench('old: json + repr', lambda: old_decode(raw))
+    bench('new: decode_json + extract', lambda: new_decode(raw))
+    bench('new: stdlib json + extract', lambda: stdlib_decode(raw))
+    bench('rejected: selective hook', lambda: selective_decode(raw))
+
+print(f"\n📤 Response encoding (what the runtime serializes)")
+response = build_battery_response(
+    speech_text="Your home battery is at 87 percent.",
+    battery_percent=87,
+    battery_power=-420,
+    solar_power=3120,
+    grid_power=12,
+    consumption_power=2704,
+    has_display=True
+)
+print(f"   Response size: {len(json.dumps(response))} bytes")
+bench('build + json.dumps', lambda: json.dumps(build_battery_response(
+    "Your home battery is at 87 percent.", 87, -420, 3120, 12, 2704, True)))
+bench('build (uncached doc)', lambda: (lambda_function.get_apl_document.cache_clear(), build_battery_response(
+    "Your home battery is at 87 percent.", 87, -420, 3120, 12, 2704, True)))
+bench('build (cached doc)', lambda: build_battery_response(
+    "Your home battery is at 87 percent.", 87, -420, 3120, 12, 2704, True))
+
+print("\n" + "=" * 60)
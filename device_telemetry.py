@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from user_cache import LRUCache
+
+# Realtime telemetry per device (inverters, battery packs), fetched from
+# device/latest in batches and normalized into the station snapshot schema.
+
+BATCH_SIZE = 10  # Most serial numbers device/latest accepts per request
+MAX_PARALLEL_BATCHES = 4
+DEVICE_TTL = 30
+
+# Device snapshots per user and serial number
+device_cache = LRUCache(ttl=DEVICE_TTL)
+
+# Snapshot fields, with the device/latest data keys Deye reports them under
+DEVICE_FIELDS = {
+    'battery_percent': ('SOC', 'BMSSOC', 'BatterySOC'),
+    'battery_power': ('BatteryPower', 'BMSPower'),
+    'solar_power': ('TotalSolarPower', 'TotalDCInputPower', 'PVPower'),
+    'grid_power': ('TotalGridPower', 'GridPower'),
+    'consumption_power': ('TotalConsumptionPower', 'LoadPower'),
+}
+
+
+def parse_number(value):
+    """A device/latest value as a float, or None for blanks and placeholders such as 'N/A' or '--'"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_device(item):
+    """
+    Turn a device/latest item into a snapshot with the station fields plus
+    the device's serial number, type and whether it reports a battery.
+    Values that aren't numbers are skipped; fields without one become 0.
+    """
+    values = {data['key']: parse_number(data.get('value')) for data in item.get('dataList') or []}
+    snapshot = {
+        'device_sn': str(item['deviceSn']),
+        'device_type': item.get('deviceType'),
+        'has_battery': any(values.get(name) is not None for name in DEVICE_FIELDS['battery_percent'])
+    }
+    for field, names in DEVICE_FIELDS.items():
+        value = next((values[name] for name in names if values.get(name) is not None), 0)
+        snapshot[field] = int(value)
+    return snapshot
+
+
+def fetch_batch(post, serials):
+    """Fetch realtime data for up to BATCH_SIZE serial numbers in one request"""
+    result = post("/v1.0/device/latest", {"deviceList": serials})
+    if result.get('code') != '1000000' and not result.get('success'):
+        raise RuntimeError(f"Device data error: {result.get('msg')}")
+    return [normalize_device(item) for item in result.get('deviceDataList') or []]
+
+
+def get_device_snapshots(post, account_key, serials):
+    """
+    Snapshots for the given serial numbers, keyed by serial.
+    Cached devices are reused for DEVICE_TTL seconds; the rest are fetched
+    in batches of BATCH_SIZE, several batches in parallel. Serials Deye
+    returns no data for are left out.
+    """
+    snapshots = {}
+    missing = []
+    for serial in dict.fromkeys(str(serial) for serial in serials):
+        snapshot = device_cache.get((account_key, serial))
+        if snapshot is None:
+            missing.append(serial)
+        else:
+            snapshots[serial] = snapshot
+
+    batches = [missing[i:i + BATCH_SIZE] for i in range(0, len(missing), BATCH_SIZE)]
+    if batches:
+        print(f"Device fetch: {len(missing)} device(s) in {len(batches)} batch(es)")
+        with ThreadPoolExecutor(max_workers=min(len(batches), MAX_PARALLEL_BATCHES)) as executor:
+            for batch in executor.map(lambda batch: fetch_batch(post, batch), batches):
+                for snapshot in batch:
+                    snapshots[snapshot['device_sn']] = device_cache.set((account_key, snapshot['device_sn']), snapshot)
+
+    return snapshots
@@ -0,0 +1,192 @@
+import argparse
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal local stand-in for the Deye Cloud API, for exercising the skill
+# without real credentials. Several instances on different ports can be used
+# as candidate regional endpoints (see DEYE_API_URLS).
+#
+# Run with: python deye_simulator.py --port 8001 --delay 0.05
+
+
+class DeyeSimulatorHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle_request(self):
+        time.sleep(self.server.delay)
+        if not self.server.healthy:
+            self.send_json({'code': '5000000', 'msg': 'simulated outage', 'success': False}, status=503)
+            return False
+        return True
+
+    def token(self):
+        return f'simulated-token-{self.server.server_port}'
+
+    def send_page(self, payload, list_field, items):
+        page, size = int(payload.get('page', 1)), int(payload.get('size', 10))
+        self.send_json({
+            'code': '1000000',
+            'msg': 'success',
+            'success': True,
+            'total': len(items),
+            list_field: items[(page - 1) * size:page * size]
+        })
+
+    def do_GET(self):
+        self.server.request_log.append(self.path)
+        if self.handle_request():
+            self.send_json({'code': '1000000', 'msg': 'simulator', 'success': True})
+
+    def do_POST(self):
+        if not self.handle_request():
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        path = self.path.split('?')[0]
+        self.server.request_log.append(path)
+
+        if path != '/v1.0/account/token' and self.headers.get('Authorization') != f"Bearer {self.token()}":
+            # Tokens are only valid in the region that issued them
+            self.send_json({'code': '2101003', 'msg': 'invalid access token', 'success': False}, status=401)
+            return
+
+        if path == '/v1.0/account/token' and not self.server.accept_logins:
+            self.send_json({'code': '2101010', 'msg': 'account not found in this region', 'success': False})
+        elif path == '/v1.0/account/token':
+            self.send_json({
+                'code': '1000000',
+                'msg': 'success',
+                'success': True,
+                'accessToken': self.token(),
+                'expiresIn': 7200
+            })
+        elif path == '/v1.0/station/latest':
+            self.send_json(dict(self.server.station, stationId=payload.get('stationId')))
+        elif path == '/v1.0/station/list':
+            self.send_page(payload, 'stationList', self.server.stations)
+        elif path == '/v1.0/device/list':
+            self.send_page(payload, 'deviceList', self.server.devices)
+        elif path == '/v1.0/device/latest':
+            serials = payload.get('deviceList') or []
+            if len(serials) > 10:
+                self.send_json({'code': '2101000', 'msg': 'at most 10 devices per request', 'success': False})
+                return
+            devices = {device['deviceSn']: device for device in self.server.devices}
+            self.send_json({
+                'code': '1000000',
+                'msg': 'success',
+                'success': True,
+                'deviceDataList': [device_item(devices[sn]) for sn in serials if sn in devices]
+            })
+        elif path == '/v1.0/station/history':
+            self.send_json({
+                'code': '1000000',
+                'msg': 'success',
+                'success': True,
+                'stationDataItems': history_items(payload['startAt'], payload['endAt'])
+            })
+        else:
+            self.send_json({'code': '2101019', 'msg': f'unknown path {path}', 'success': False}, status=404)
+
+
+def history_items(start_at, end_at):
+    """Deterministic daily station/history items for an inclusive date range"""
+    items = []
+    day = date.fromisoformat(start_at)
+    while day <= date.fromisoformat(end_at):
+        generation = 10.0 + day.day % 7
+        items.append({
+            'year': day.year,
+            'month': day.month,
+            'day': day.day,
+            'generationValue': generation,
+            'consumptionValue': 12.0,
+            'gridValue': round(generation * 0.25, 2),
+            'purchaseValue': 4.5,
+            'chargeValue': 6.0,
+            'dischargeValue': 5.5
+        })
+        day += timedelta(days=1)
+    return items
+
+
+def device_item(device):
+    """Deterministic device/latest item for a simulated device"""
+    seed = int(device['deviceSn']) % 50
+    data = [
+        ('SOC', 40 + seed, '%'),
+        ('BatteryPower', (seed - 25) * 40, 'W'),
+    ]
+    if device.get('deviceType') == 'INVERTER':
+        data += [
+            ('TotalSolarPower', 1500 + seed * 30, 'W'),
+            ('TotalGridPower', 10, 'W'),
+            ('TotalConsumptionPower', 1800, 'W'),
+        ]
+    return {
+        'deviceSn': device['deviceSn'],
+        'deviceType': device.get('deviceType'),
+        'collectionTime': int(time.time()),
+        'dataList': [{'key': key, 'value': str(value), 'unit': unit} for key, value, unit in data]
+    }
+
+
+def start_simulator(port=0, delay=0.0, healthy=True, verbose=False):
+    """
+    Start a simulator in a daemon thread and return the server.
+    Change server.delay / server.healthy at runtime to simulate degradation,
+    and server.accept_logins to simulate an account registered in another region.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), DeyeSimulatorHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    server.healthy = healthy
+    server.accept_logins = True
+    server.verbose = verbose
+    server.request_log = []
+    server.station = {
+        'code': '1000000',
+        'msg': 'success',
+        'success': True,
+        'generationPower': 3120.0,
+        'consumptionPower': 2704.5,
+        'gridPower': 12.0,
+        'batteryPower': -420.0,
+        'batterySoc': 87.0,
+        'lastUpdateTime': int(time.time())
+    }
+    server.stations = [{'id': 12345, 'name': 'Home'}]
+    server.devices = [{'deviceSn': '2301234567', 'deviceId': 1, 'deviceType': 'INVERTER', 'stationId': 12345}]
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local Deye Cloud API simulator')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before each response')
+    parser.add_argument('--unhealthy', action='store_true', help='Answer every request with HTTP 503')
+    args = parser.parse_args()
+
+    server = start_simulator(args.port, args.delay, not args.unhealthy, verbose=True)
+    print(f"🛰️  Deye simulator listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,219 @@
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from user_cache import LRUCache
+
+# Daily energy history per account and station (reused across Lambda invocations).
+# Each row remembers when it was fetched. Rows fetched once their day was
+# MISSING_GRACE_DAYS past are final and never fetched again; younger rows
+# are provisional and refetched after TODAY_TTL seconds, or as soon as their
+# day has ended if they were fetched during it (partial totals).
+history_cache = LRUCache()
+history_lock = threading.Lock()
+
+TODAY_TTL = 300
+MAX_RANGE_DAYS = 30  # Longest range requested from station/history in one call
+# Deye can report a day late (e.g. after the logger reconnects), so days it
+# returned nothing for are only cached as zeros once they are this old, and
+# rows fetched before then are provisional
+MISSING_GRACE_DAYS = 3
+
+# Columns stored per day, with the station/history field each one comes from (kWh)
+HISTORY_FIELDS = (
+    ('generation', 'generationValue'),
+    ('consumption', 'consumptionValue'),
+    ('grid_export', 'gridValue'),
+    ('grid_import', 'purchaseValue'),
+    ('charge', 'chargeValue'),
+    ('discharge', 'dischargeValue'),
+)
+EMPTY_DAY = (0.0,) * len(HISTORY_FIELDS)
+
+
+class PeriodError(ValueError):
+    """A slot value that doesn't name a day, week or month"""
+
+
+class FuturePeriodError(ValueError):
+    """A period that hasn't started yet"""
+
+
+def parse_period(value, today=None):
+    """
+    Turn an AMAZON.DATE slot value into an inclusive (start, end, kind) range.
+    Supports days (2025-11-01), ISO weeks (2025-W44) and months (2025-11);
+    no value (or PRESENT_REF) means today. The end is clamped to today.
+    Raises PeriodError for anything else.
+    """
+    today = today or date.today()
+    start = end = today
+    kind = 'day'
+
+    try:
+        if not value or value == 'PRESENT_REF':
+            pass
+        elif re.fullmatch(r'\d{4}-\d{2}-\d{2}', value):
+            start = end = date.fromisoformat(value)
+        elif re.fullmatch(r'\d{4}-W\d{2}', value):
+            start = datetime.strptime(f"{value}-1", '%G-W%V-%u').date()
+            end = start + timedelta(days=6)
+            kind = 'week'
+        elif re.fullmatch(r'\d{4}-\d{2}', value):
+            start = date.fromisoformat(f"{value}-01")
+            end = (start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            kind = 'month'
+        else:
+            raise PeriodError(f"Unsupported period {value}")
+    except PeriodError:
+        raise
+    except ValueError as e:
+        # Well-formed but impossible, e.g. 2025-02-30 or 2025-W54
+        raise PeriodError(f"Invalid period {value}: {e}") from e
+
+    return start, min(end, today), kind
+
+
+def fetch_history(post, station_id, start, end):
+    """
+    Fetch daily history for an inclusive range in bulk.
+    Returns {date: row} for the days Deye has data for.
+    """
+    days = {}
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=MAX_RANGE_DAYS - 1), end)
+        result = post("/v1.0/station/history", {
+            "stationId": int(station_id),
+            "granularity": 2,  # Daily
+            "startAt": chunk_start.isoformat(),
+            "endAt": chunk_end.isoformat()
+        })
+        if result.get('code') != '1000000' and not result.get('success'):
+            raise RuntimeError(f"History error: {result.get('msg')}")
+
+        for item in result.get('stationDataItems') or []:
+            day = date(int(item['year']), int(item['month']), int(item['day']))
+            days[day] = tuple(float(item.get(field) or 0) for _, field in HISTORY_FIELDS)
+
+        chunk_start = chunk_end + timedelta(days=1)
+    return days
+
+
+def missing_ranges(cached, start, end):
+    """Group the days between start and end that are not cached into contiguous ranges"""
+    ranges = []
+    day = start
+    while day <= end:
+        if day not in cached:
+            if ranges and ranges[-1][1] == day - timedelta(days=1):
+                ranges[-1][1] = day
+            else:
+                ranges.append([day, day])
+        day += timedelta(days=1)
+    return ranges
+
+
+def is_settled(day, fetched_on, fetched_at, today):
+    """Whether a row fetched on fetched_on (at timestamp fetched_at) can still be served"""
+    if fetched_on > day + timedelta(days=MISSING_GRACE_DAYS):
+        return True
+    if fetched_on <= day < today:
+        # Fetched while its day was still running, so the totals are partial
+        return False
+    return time.time() - fetched_at <= TODAY_TTL
+
+
+def get_daily_rows(post, account_key, station_id, start, end, today=None):
+    """
+    Return the cached rows for every day in the range, fetching only the
+    days that are missing or whose provisional rows are due (see is_settled).
+    Days without data count as zeros; recent ones are asked for again next time.
+    """
+    today = today or date.today()
+    with history_lock:
+        cache_key = (account_key, int(station_id))
+        station = history_cache.get(cache_key) or {'days': {}, 'fetched': {}}
+        days = station['days']
+        fetched_times = station['fetched']  # day -> (local date, timestamp) it was fetched
+
+        for day in [day for day in days if start <= day <= end]:
+            if not is_settled(day, *fetched_times[day], today):
+                del days[day]
+                del fetched_times[day]
+
+        ranges = missing_ranges(days, start, end)
+        for range_start, range_end in ranges:
+            print(f"History fetch: station {station_id} {range_start} to {range_end}")
+            fetched = fetch_history(post, station_id, range_start, range_end)
+            fetched_at = time.time()
+            day = range_start
+            while day <= range_end:
+                if day in fetched:
+                    days[day] = fetched[day]
+                elif day < today - timedelta(days=MISSING_GRACE_DAYS):
+                    days[day] = EMPTY_DAY
+                if day in days:
+                    fetched_times[day] = (today, fetched_at)
+                day += timedelta(days=1)
+        if ranges:
+            history_cache.set(cache_key, station)
+
+        return [days.get(start + timedelta(days=offset), EMPTY_DAY) for offset in range((end - start).days + 1)]
+
+
+def aggregate_rows(rows):
+    """
+    Sum the daily rows column by column into a rollup dict, adding the
+    self-consumption ratio (share of solar used on site rather than exported)
+    """
+    columns = zip(*rows) if rows else ((),) * len(HISTORY_FIELDS)
+    totals = dict(zip((name for name, _ in HISTORY_FIELDS), map(sum, columns)))
+    totals['days'] = len(rows)
+
+    generation = totals['generation']
+    if generation > 0:
+        totals['self_consumption'] = max(0.0, min(1.0, (generation - totals['grid_export']) / generation))
+    else:
+        totals['self_consumption'] = None
+    return totals
+
+
+def get_energy_summary(post, account_key, station_id, period=None, today=None):
+    """
+    Aggregated energy totals for the period named by an AMAZON.DATE slot value.
+    Returns the rollup dict with 'start', 'end' and 'kind' added.
+    Raises PeriodError for unparseable periods and FuturePeriodError for
+    periods that haven't started yet.
+    """
+    today = today or date.today()
+    start, end, kind = parse_period(period, today)
+    if start > end:
+        raise FuturePeriodError(f"Period {period} is in the future")
+
+    summary = aggregate_rows(get_daily_rows(post, account_key, station_id, start, end, today))
+    summary['start'] = start
+    summary['end'] = end
+    summary['kind'] = kind
+    return summary
+
+
+def describe_period(summary, today=None):
+    """Spoken name of the summary's period, e.g. 'today' or 'this week'"""
+    today = today or date.today()
+    start = summary['start']
+
+    if summary['kind'] == 'month':
+        if (start.year, start.month) == (today.year, today.month):
+            return "this month"
+        return f"in {start.strftime('%B')}"
+    if summary['kind'] == 'week':
+        if start == today - timedelta(days=today.weekday()):
+            return "this week"
+        return f"in the week of {start.strftime('%B')} {start.day}"
+    if start == today:
+        return "today"
+    if start == today - timedelta(days=1):
+        return "yesterday"
+    return f"on {start.strftime('%B')} {start.day}"
@@ -1,12 +1,80 @@
+import functools
 import json
 import requests
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
 
-# Cache for access token (reused across Lambda invocations)
-token_cache = {
-    'access_token': None,
-    'expires_at': 0
+import accounts
+import device_telemetry
+import energy_history
+import profiling
+import skill_router
+import station_index
+import warmup
+from skill_router import route
+from user_cache import LRUCache
+
+try:
+    import orjson  # Optional fast JSON backend
+except ImportError:
+    orjson = None
+
+# Access tokens per user (reused across Lambda invocations)
+token_cache = LRUCache()
+
+# Latest station snapshots per user and station, briefly reused
+SNAPSHOT_TTL = int(os.environ.get('DEYE_SNAPSHOT_TTL', 30))
+snapshot_cache = LRUCache(ttl=SNAPSHOT_TTL)
+
+# Routes that don't need a configured Deye account
+PUBLIC_ROUTES = {
+    'IntentRequest/AMAZON.HelpIntent',
+    'IntentRequest/AMAZON.CancelIntent',
+    'IntentRequest/AMAZON.StopIntent',
+    'SessionEndedRequest'
+}
+
+# Devices read out individually before summarizing the rest
+MAX_SPOKEN_DEVICES = 5
+
+# Intents answered from aggregated station history
+ENERGY_INTENTS = ('GetSolarGeneration', 'GetGridImport', 'GetSelfConsumption')
+
+# Shared HTTP session so warm invocations reuse DNS/TLS connections
+http_session = requests.Session()
+
+# Regional endpoint choice (reused across Lambda invocations). The latency
+# probe doesn't depend on the account, so one ranking is shared; each account
+# keeps its own order on top of it, with endpoints that failed for it demoted.
+endpoint_probe = {
+    'ranked': None,
+    'checked_at': 0,
+    'refreshing': False
+}
+endpoint_cache = LRUCache()
+endpoint_lock = threading.Lock()
+probe_lock = threading.Lock()  # Lets concurrent first requests share one probe
+
+# Logins are serialized per account (striped by key, so the locks stay bounded)
+login_locks = [threading.Lock() for _ in range(64)]
+
+ENDPOINT_TTL = int(os.environ.get('DEYE_ENDPOINT_TTL', 900))  # Re-probe every 15 min
+PROBE_TIMEOUT = float(os.environ.get('DEYE_PROBE_TIMEOUT', 2))
+
+# Init-phase warmup (see warm_up at the bottom of this file)
+WARMUP_BUDGET = float(os.environ.get('DEYE_WARMUP_BUDGET_MS', 1500)) / 1000
+
+# Fields extracted from station/latest, with the alternative names Deye uses
+STATION_FIELDS = {
+    'battery_percent': ('batterySoc', 'battery_soc', 'batterySOC'),
+    'battery_power': ('batteryPower', 'battery_power'),
+    'solar_power': ('generationPower', 'generation_power', 'pvPower'),
+    'grid_power': ('gridPower', 'grid_power'),
+    'consumption_power': ('consumptionPower', 'consumption_power'),
 }
 
 
@@ -14,178 +82,476 @@ def lambda_handler(event, context):
     """
     Main Lambda handler for Alexa Skill with Deye Cloud API
     """
-    request_type = event['request']['type']
+    return skill_router.dispatch(event, context)
 
-    # Check if device supports APL (for visual display)
-    has_display = 'Alexa.Presentation.APL' in event['context']['System']['device']['supportedInterfaces']
 
-    if request_type == "LaunchRequest":
-        # Instead of just greeting, fetch the battery status immediately
-        return get_battery_status(has_display)
+def supports_display(event):
+    """Check if device supports APL (for visual display)"""
+    return 'Alexa.Presentation.APL' in event['context']['System']['device']['supportedInterfaces']
 
-    elif request_type == "IntentRequest":
-        intent_name = event['request']['intent']['name']
-        print(f"Intent received: {intent_name}")  # Debug log
-        print(f"Intent slots: {event['request']['intent'].get('slots', {})}")  # Debug log
 
-        if intent_name == "GetBatteryStatus":
-            # Check if there's a slot that needs to be filled
-            slots = event['request']['intent'].get('slots', {})
+def get_slots(event):
+    """Slots of the event's intent, keyed by slot name"""
+    return event['request']['intent'].get('slots') or {}
 
-            # If a device/station slot exists but is empty, ask the user
-            for slot_name, slot_value in slots.items():
-                if not slot_value.get('value'):
-                    return build_response(
-                        f"Which device would you like to check? {slot_name}",
-                        should_end=False,
-                        has_display=has_display
-                    )
 
-            # All required slots are filled, get battery status
-            return get_battery_status(has_display)
+# Registered before auth so profiles cover the whole invocation
+skill_router.use(profiling.profiling_middleware)
 
-        elif intent_name == "AMAZON.HelpIntent":
-            return build_response("You can ask me: what's my battery percentage?", has_display=has_display)
 
-        elif intent_name == "AMAZON.CancelIntent" or intent_name == "AMAZON.StopIntent":
-            return build_response("Goodbye!", should_end=True, has_display=has_display)
+@skill_router.use
+def auth_middleware(key, event, context, call_next):
+    """
+    Attach the user's Deye account to the event as event['account'],
+    telling users without one that the skill isn't set up for them
+    """
+    account = accounts.get_account(event)
+    if account is None and key not in PUBLIC_ROUTES:
+        print(f"No account configured for {accounts.get_user_id(event)}")
+        return build_unconfigured_response(accounts.get_user_id(event), supports_display(event))
+    return call_next(dict(event, account=account), context)
 
-        else:
-            # Debug: log unknown intent
-            print(f"Unknown intent: {intent_name}")
-            print(f"Full event: {event}")
-            # Try to fetch battery status anyway for any battery-related request
-            if "bateria" in intent_name.lower() or "battery" in intent_name.lower():
-                return get_battery_status(has_display)
 
-    return build_response("I didn't understand that. Please try again.", has_display=has_display)
+@route('LaunchRequest')
+def handle_launch(event, context):
+    # Instead of just greeting, fetch the battery status immediately
+    return get_battery_status(event['account'], supports_display(event))
+
+
+@route('IntentRequest', 'GetBatteryStatus')
+def handle_battery_status(event, context):
+    account = event['account']
+    has_display = supports_display(event)
+    spoken_name = next((slot['value'] for slot in get_slots(event).values() if slot.get('value')), None)
+
+    if spoken_name is None:
+        # No station/device named; use the account's station or ask for one
+        if account.get('station_id'):
+            return get_battery_status(account, has_display)
+        return build_response(
+            "Which device would you like to check?",
+            should_end=False,
+            has_display=has_display
+        )
+
+    entry = resolve_station_name(account, spoken_name)
+    if entry is None:
+        return build_response(
+            f"I couldn't find a station or device called {spoken_name}. Which one would you like to check?",
+            should_end=False,
+            has_display=has_display
+        )
+
+    return get_battery_status(account, has_display, station_id=entry['station_id'], station_name=entry['station_name'])
+
+
+@route('IntentRequest', 'GetDeviceStatus')
+def handle_device_status(event, context):
+    account = event['account']
+    has_display = supports_display(event)
+    spoken_name = next((slot['value'] for slot in get_slots(event).values() if slot.get('value')), None)
+
+    if spoken_name is None:
+        return build_response(
+            "Which device would you like to check?",
+            should_end=False,
+            has_display=has_display
+        )
+
+    entry = resolve_station_name(account, spoken_name)
+    if entry is None:
+        return build_response(
+            f"I couldn't find a station or device called {spoken_name}. Which one would you like to check?",
+            should_end=False,
+            has_display=has_display
+        )
+
+    return get_device_status(account, entry, has_display)
+
+
+@route('IntentRequest', ENERGY_INTENTS)
+def handle_energy_summary(event, context):
+    period = get_slots(event).get('period', {}).get('value')
+    return get_energy_report(event['account'], event['request']['intent']['name'], period, supports_display(event))
+
+
+@route('IntentRequest', 'AMAZON.HelpIntent')
+def handle_help(event, context):
+    return build_response(
+        "You can ask me: what's my battery percentage? "
+        "Or: how much solar did I generate today?",
+        has_display=supports_display(event)
+    )
+
+
+@route('IntentRequest', ('AMAZON.CancelIntent', 'AMAZON.StopIntent'))
+def handle_stop(event, context):
+    return build_response("Goodbye!", should_end=True, has_display=supports_display(event))
+
+
+@route(None)
+def handle_unknown(event, context):
+    return build_response("I didn't understand that. Please try again.", has_display=supports_display(event))
+
 
+def resolve_battery_intent(intent_name):
+    """Route unknown battery-related intents (e.g. localized names) to the battery status"""
+    if "bateria" in intent_name.lower() or "battery" in intent_name.lower():
+        return lambda event, context: get_battery_status(event['account'], supports_display(event))
+    return None
 
-def get_access_token():
+
+skill_router.add_resolver('IntentRequest', resolve_battery_intent)
+
+
+def get_api_urls():
     """
-    Get or refresh Deye Cloud access token
+    Candidate Deye base URLs, from DEYE_API_URLS (comma separated) or DEYE_API_URL
     """
-    # Check if cached token is still valid
-    current_time = int(time.time())
-    if token_cache['access_token'] and token_cache['expires_at'] > current_time:
-        return token_cache['access_token']
+    urls = os.environ.get('DEYE_API_URLS') or os.environ.get('DEYE_API_URL', 'https://eu1-developer.deyecloud.com/')
+    return [url.strip().rstrip('/') for url in urls.split(',') if url.strip()]
 
-    # Request new token
-    api_url = os.environ.get('DEYE_API_URL').rstrip('/')
-    app_id = os.environ.get('DEYE_APP_ID')
-    token_url = f"{api_url}/v1.0/account/token?appId={app_id}"
 
+def probe_endpoint(api_url):
+    """
+    Measure the round trip to a Deye base URL.
+    Returns the latency in seconds, or None if the endpoint is unreachable or erroring.
+    """
+    start = time.monotonic()
+    try:
+        response = http_session.get(f"{api_url}/", timeout=PROBE_TIMEOUT)
+    except requests.exceptions.RequestException as e:
+        print(f"Probe failed for {api_url}: {str(e)}")
+        return None
+
+    if response.status_code >= 500:
+        print(f"Probe failed for {api_url}: HTTP {response.status_code}")
+        return None
+    return time.monotonic() - start
+
+
+def probe_endpoints(urls):
+    """
+    Probe all candidate URLs in parallel and rank the healthy ones, fastest first
+    """
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        latencies = list(executor.map(probe_endpoint, urls))
+
+    ranked = sorted(
+        (latency, url) for url, latency in zip(urls, latencies) if latency is not None
+    )
+    print(f"Endpoint probe: {[(url, round(latency * 1000)) for latency, url in ranked]}")
+    return [url for _, url in ranked]
+
+
+def refresh_endpoints(urls):
+    """Probe the candidates and store the shared ranking"""
+    return store_endpoints(urls, probe_endpoints(urls))
+
+
+def store_endpoints(urls, ranked):
+    """Store a probed ranking of the candidates, shared by every account"""
+    with endpoint_lock:
+        # Keep the previous ranking if every endpoint failed the probe
+        if ranked:
+            endpoint_probe['ranked'] = ranked
+        elif endpoint_probe['ranked'] is None:
+            endpoint_probe['ranked'] = list(urls)
+        endpoint_probe['checked_at'] = time.time()
+        endpoint_probe['refreshing'] = False
+        return list(endpoint_probe['ranked'])
+
+
+def get_ranked_endpoints(account_key='default'):
+    """
+    Candidate endpoints for an account, fastest healthy first.
+
+    The first call in the container probes synchronously; afterwards the
+    shared ranking is served and re-probed in a background thread once it
+    is older than ENDPOINT_TTL. Each account starts from the latest probe,
+    with endpoints that rejected its login kept at the back.
+    """
+    urls = get_api_urls()
+    if len(urls) == 1:
+        return urls
+
+    if endpoint_probe['ranked'] is None:
+        with probe_lock:
+            if endpoint_probe['ranked'] is None:
+                refresh_endpoints(urls)
+
+    with endpoint_lock:
+        stale = time.time() - endpoint_probe['checked_at'] > ENDPOINT_TTL
+        if stale and not endpoint_probe['refreshing']:
+            endpoint_probe['refreshing'] = True
+            threading.Thread(target=refresh_endpoints, args=(urls,), daemon=True).start()
+
+        entry = endpoint_cache.get(account_key)
+        if entry is None or entry['checked_at'] != endpoint_probe['checked_at']:
+            rejected = entry['rejected'] if entry else set()
+            ranked = endpoint_probe['ranked']
+            entry = {
+                'ranked': [url for url in ranked if url not in rejected] + [url for url in ranked if url in rejected],
+                'checked_at': endpoint_probe['checked_at'],
+                'rejected': rejected
+            }
+            endpoint_cache.set(account_key, entry)
+        return list(entry['ranked'])
+
+
+def select_api_url(account_key='default'):
+    """Return the fastest healthy Deye base URL for an account"""
+    return get_ranked_endpoints(account_key)[0]
+
+
+def demote_endpoint(api_url, account_key='default', rejected=False):
+    """
+    Move a failing endpoint to the back of the account's ranking. Endpoints
+    that rejected the account's login stay at the back after re-probes too.
+    """
+    with endpoint_lock:
+        entry = endpoint_cache.get(account_key)
+        if entry and api_url in entry['ranked']:
+            entry['ranked'].remove(api_url)
+            entry['ranked'].append(api_url)
+            if rejected:
+                entry['rejected'].add(api_url)
+                print(f"Login rejected, failing over from {api_url}")
+            else:
+                print(f"Endpoint degraded, failing over from {api_url}")
+
+
+class LoginRejectedError(Exception):
+    """An endpoint refused the account's credentials (other regions may accept them)"""
+
+
+def post_endpoint(api_url, path, payload, access_token=None, timeout=10):
+    """
+    POST to one Deye endpoint and return the decoded JSON body.
+    5xx responses raise HTTPError so callers can fail over.
+    """
     headers = {
         'Content-Type': 'application/json'
     }
+    if access_token:
+        headers['Authorization'] = f'Bearer {access_token}'
+
+    response = http_session.post(f"{api_url}{path}", headers=headers, json=payload, timeout=timeout)
+    if response.status_code >= 500:
+        raise requests.exceptions.HTTPError(f"HTTP {response.status_code} from {api_url}")
+    return decode_json(response.content)
+
+
+def with_failover(account_key, request):
+    """
+    Call request(api_url) on the account's best endpoint, moving on to the
+    next candidate on connection errors, timeouts, 5xx responses and
+    rejected logins
+    """
+    endpoints = get_ranked_endpoints(account_key)
+    for attempt, api_url in enumerate(endpoints, 1):
+        try:
+            return request(api_url)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                requests.exceptions.HTTPError, LoginRejectedError) as e:
+            error = e
+
+        if len(endpoints) == 1:
+            raise error
+        demote_endpoint(api_url, account_key, rejected=isinstance(error, LoginRejectedError))
+        if attempt == len(endpoints):
+            raise error
+
+
+def deye_post(path, payload, account=None, account_key='default', timeout=10):
+    """
+    POST to the Deye API on the best endpoint with failover.
+    With an account the request is authenticated with a token issued by
+    the endpoint it is sent to, logging in again after a failover.
+    Returns the decoded JSON body.
+    """
+    if account is not None:
+        account_key = account['key']
+
+    def request(api_url):
+        access_token = endpoint_token(account, api_url) if account is not None else None
+        return post_endpoint(api_url, path, payload, access_token, timeout)
+
+    return with_failover(account_key, request)
+
+
+def login(account, api_url):
+    """
+    Log in to one endpoint and cache the token for the account.
+    Network errors propagate; returns None if Deye rejects the login.
+    """
+    app_id = os.environ.get('DEYE_APP_ID')
 
     payload = {
         "appSecret": os.environ.get('DEYE_APP_SECRET'),
-        "email": os.environ.get('DEYE_EMAIL'),
-        "password": os.environ.get('DEYE_PASSWORD_HASH')  # Must be SHA256 hash (lowercase)
+        "email": account['email'],
+        "password": account['password_hash']  # Must be SHA256 hash (lowercase)
     }
 
-    try:
-        response = requests.post(token_url, headers=headers, json=payload, timeout=10)
-        result = response.json()
+    result = post_endpoint(api_url, f"/v1.0/account/token?appId={app_id}", payload)
 
-        if result.get('code') == '1000000' or result.get('success'):
-            access_token = result['data']['access_token'] if 'data' in result else result.get('accessToken')
-            expires_in = result.get('expiresIn', 7200)  # Default 2 hours
+    if result.get('code') == '1000000' or result.get('success'):
+        access_token = result['data']['access_token'] if 'data' in result else result.get('accessToken')
+        expires_in = result.get('expiresIn', 7200)  # Default 2 hours
 
-            # Cache the token
-            token_cache['access_token'] = access_token
-            token_cache['expires_at'] = current_time + int(expires_in) - 300  # Refresh 5 min early
+        # Cache the token, refreshing 5 min early
+        token_cache.set(account['key'], {
+            'access_token': access_token,
+            'api_url': api_url
+        }, ttl=int(expires_in) - 300)
 
-            return access_token
-        else:
-            print(f"Token error: {result}")
-            return None
+        return access_token
+
+    print(f"Token error: {result}")
+    return None
 
+
+def endpoint_token(account, api_url):
+    """
+    The account's token for an endpoint. Tokens are issued per region, so a
+    cached token from another endpoint is replaced by a fresh login.
+    """
+    cached = token_cache.get(account['key'])
+    if cached and cached['api_url'] == api_url:
+        return cached['access_token']
+
+    with login_locks[hash(account['key']) % len(login_locks)]:
+        # Another thread (e.g. the init warmup) may have logged in meanwhile
+        cached = token_cache.get(account['key'])
+        if cached and cached['api_url'] == api_url:
+            return cached['access_token']
+
+        access_token = login(account, api_url)
+        if not access_token:
+            raise LoginRejectedError(f"Deye login rejected by {api_url}")
+        return access_token
+
+
+def get_access_token(account):
+    """
+    Get or refresh the Deye Cloud access token for an account on its best endpoint
+    """
+    try:
+        return with_failover(account['key'], lambda api_url: endpoint_token(account, api_url))
     except Exception as e:
         print(f"Token request error: {str(e)}")
         return None
 
 
-def get_battery_status(has_display=False):
+def account_post(account):
+    """A post(path, payload) callable authenticated as the account"""
+    return lambda path, payload: deye_post(path, payload, account=account)
+
+
+def resolve_station_name(account, spoken_name):
     """
-    Fetch battery status from Deye inverter
+    Map a spoken station or device name to its station index entry, or None
     """
+    if not get_access_token(account):
+        return None
+
     try:
-        # Get access token
-        access_token = get_access_token()
+        return station_index.resolve_station(account_post(account), account['key'], spoken_name)
+    except Exception as e:
+        print(f"Station index error: {str(e)}")
+        return None
 
-        if not access_token:
-            return build_response(
-                "Sorry, I couldn't connect to your inverter. Please check your credentials.",
-                has_display=has_display
-            )
 
-        # Get station data using the correct endpoint
-        api_url = os.environ.get('DEYE_API_URL').rstrip('/')
-        station_url = f"{api_url}/v1.0/station/latest"
+def decode_json(raw):
+    """Decode a JSON body with orjson when available, stdlib json otherwise"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
-        headers = {
-            'Authorization': f'Bearer {access_token}',
-            'Content-Type': 'application/json'
-        }
 
-        station_payload = {
-            "stationId": int(os.environ.get('DEYE_STATION_ID'))
-        }
+def extract_station_snapshot(result):
+    """
+    Pick the STATION_FIELDS out of a decoded station/latest response.
+    Missing or null values become 0, everything else is truncated to int.
+    """
+    snapshot = {}
+    for field, names in STATION_FIELDS.items():
+        value = 0
+        for name in names:
+            if result.get(name):
+                value = result[name]
+                break
+        snapshot[field] = int(value)
+    return snapshot
 
-        response = requests.post(station_url, json=station_payload, headers=headers, timeout=10)
-        result = response.json()
 
-        print(f"API Response: {result}")  # For debugging
+def get_station_snapshot(account, station_id):
+    """
+    Latest STATION_FIELDS for one of the account's stations, reused for
+    SNAPSHOT_TTL seconds. Returns None if Deye rejects the request.
+    """
+    cache_key = (account['key'], int(station_id))
+    snapshot = snapshot_cache.get(cache_key)
+    if snapshot is not None:
+        return snapshot
 
-        if result.get('code') != '1000000' and not result.get('success'):
-            return build_response(
-                "Sorry, I couldn't retrieve your battery data.",
-                has_display=has_display
-            )
+    if not get_access_token(account):
+        return None
 
-        # Extract battery data from response (data is at top level, not nested)
-        # Common field names in Deye API:
-        battery_percent = (
-            result.get('batterySoc') or
-            result.get('battery_soc') or
-            result.get('batterySOC') or
-            0
-        )
+    # Get station data using the correct endpoint
+    station_payload = {
+        "stationId": int(station_id)
+    }
 
-        battery_power = (
-            result.get('batteryPower') or
-            result.get('battery_power') or
-            0
-        )
+    result = deye_post("/v1.0/station/latest", station_payload, account=account)
 
-        solar_power = (
-            result.get('generationPower') or
-            result.get('generation_power') or
-            result.get('pvPower') or
-            0
-        )
+    if result.get('code') != '1000000' and not result.get('success'):
+        print(f"Station error: {result.get('msg')}")
+        return None
 
-        grid_power = (
-            result.get('gridPower') or
-            result.get('grid_power') or
-            0
-        )
+    # Only the fields in STATION_FIELDS are kept (data is at top level, not nested)
+    snapshot = extract_station_snapshot(result)
+    print(f"Station snapshot: {snapshot}")  # For debugging
+    return snapshot_cache.set(cache_key, snapshot)
 
-        consumption_power = (
-            result.get('consumptionPower') or
-            result.get('consumption_power') or
-            0
-        )
 
-        battery_percent = int(battery_percent)
-        battery_power = int(battery_power)
-        solar_power = int(solar_power)
-        grid_power = int(grid_power) if grid_power else 0
-        consumption_power = int(consumption_power)
+def get_battery_status(account, has_display=False, station_id=None, station_name=None):
+    """
+    Fetch battery status from Deye inverter
+    (the account's own station unless another one is given)
+    """
+    try:
+        station_id = station_id or account.get('station_id')
+        if not station_id:
+            return build_response(
+                "Which device would you like to check?",
+                should_end=False,
+                has_display=has_display
+            )
 
-        speech_text = f"Your home battery is at {battery_percent} percent."
+        if not get_access_token(account):
+            return build_response(
+                "Sorry, I couldn't connect to your inverter. Please check your credentials.",
+                has_display=has_display
+            )
+
+        snapshot = get_station_snapshot(account, station_id)
+        if snapshot is None:
+            return build_response(
+                "Sorry, I couldn't retrieve your battery data.",
+                has_display=has_display
+            )
+
+        battery_percent = snapshot['battery_percent']
+        battery_power = snapshot['battery_power']
+        solar_power = snapshot['solar_power']
+        grid_power = snapshot['grid_power']
+        consumption_power = snapshot['consumption_power']
+
+        if station_name:
+            speech_text = f"The {station_name} battery is at {battery_percent} percent."
+        else:
+            speech_text = f"Your home battery is at {battery_percent} percent."
 
         if battery_power > 50:
             speech_text += f" Currently charging at {battery_power} watts."
@@ -216,6 +582,189 @@ def get_battery_status(has_display=False):
         )
 
 
+def describe_device(snapshot):
+    """Spoken name of a device, e.g. 'the inverter ending in 4 5 6 7'"""
+    device_type = (snapshot['device_type'] or 'device').lower()
+    return f"the {device_type} ending in {' '.join(snapshot['device_sn'][-4:])}"
+
+
+def get_device_status(account, entry, has_display=False):
+    """
+    Report realtime data for one device, or for every device of a station,
+    fetched with batched device/latest requests
+    """
+    try:
+        if not get_access_token(account):
+            return build_response(
+                "Sorry, I couldn't connect to your inverter. Please check your credentials.",
+                has_display=has_display
+            )
+
+        post = account_post(account)
+        if entry['device_sn']:
+            serials = [entry['device_sn']]
+        else:
+            serials = [device['device_sn'] for device in
+                       station_index.get_station_devices(post, account['key'], entry['station_id'])]
+
+        snapshots = device_telemetry.get_device_snapshots(post, account['key'], serials)
+        print(f"Device snapshots: {len(snapshots)} ({', '.join(snapshots)})")  # For debugging
+
+        if not snapshots:
+            return build_response(
+                f"Sorry, I couldn't retrieve any device data for {entry['station_name']}.",
+                has_display=has_display
+            )
+
+        if len(snapshots) == 1:
+            snapshot = next(iter(snapshots.values()))
+            if not snapshot['has_battery']:
+                return build_response(
+                    f"{describe_device(snapshot).capitalize()} is producing {snapshot['solar_power']} watts of solar.",
+                    has_display=has_display
+                )
+
+            speech_text = f"{describe_device(snapshot).capitalize()} is at {snapshot['battery_percent']} percent."
+            if snapshot['battery_power'] > 50:
+                speech_text += f" Currently charging at {snapshot['battery_power']} watts."
+            elif snapshot['battery_power'] < -50:
+                speech_text += f" Currently discharging at {abs(snapshot['battery_power'])} watts."
+
+            return build_battery_response(
+                speech_text=speech_text,
+                battery_percent=snapshot['battery_percent'],
+                battery_power=snapshot['battery_power'],
+                solar_power=snapshot['solar_power'],
+                grid_power=snapshot['grid_power'],
+                consumption_power=snapshot['consumption_power'],
+                has_display=has_display
+            )
+
+        batteries = [snapshot for snapshot in snapshots.values() if snapshot['has_battery']]
+        if not batteries:
+            solar_power = sum(snapshot['solar_power'] for snapshot in snapshots.values())
+            return build_response(
+                f"The {len(snapshots)} devices at {entry['station_name']} are producing {solar_power} watts of solar.",
+                has_display=has_display
+            )
+
+        reports = [f"{describe_device(snapshot)} is at {snapshot['battery_percent']} percent"
+                   for snapshot in batteries[:MAX_SPOKEN_DEVICES]]
+        speech_text = f"At {entry['station_name']}, " + ", ".join(reports) + "."
+        if len(batteries) > MAX_SPOKEN_DEVICES:
+            speech_text += f" And {len(batteries) - MAX_SPOKEN_DEVICES} more batteries."
+
+        return build_response(speech_text, has_display=has_display)
+
+    except requests.exceptions.Timeout:
+        return build_response(
+            "Sorry, the request timed out. Please try again.",
+            has_display=has_display
+        )
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return build_response(
+            "Sorry, I encountered an error retrieving your device status.",
+            has_display=has_display
+        )
+
+
+def local_today():
+    """Today's date in DEYE_TIMEZONE (the station's timezone), UTC if unset"""
+    return datetime.now(ZoneInfo(os.environ.get('DEYE_TIMEZONE', 'UTC'))).date()
+
+
+def get_energy_report(account, intent_name, period=None, has_display=False):
+    """
+    Answer an energy summary intent from the station's daily history
+    """
+    try:
+        if not account.get('station_id'):
+            return build_response(
+                "I don't know which station to report on. Please set one for your account.",
+                has_display=has_display
+            )
+
+        if not get_access_token(account):
+            return build_response(
+                "Sorry, I couldn't connect to your inverter. Please check your credentials.",
+                has_display=has_display
+            )
+
+        today = local_today()
+        summary = energy_history.get_energy_summary(
+            account_post(account),
+            account['key'],
+            account['station_id'],
+            period,
+            today=today
+        )
+        print(f"Energy summary: {summary}")  # For debugging
+
+        when = energy_history.describe_period(summary, today=today)
+
+        if intent_name == 'GetSolarGeneration':
+            speech_text = f"You generated {summary['generation']:.1f} kilowatt hours of solar {when}."
+        elif intent_name == 'GetGridImport':
+            speech_text = f"You imported {summary['grid_import']:.1f} kilowatt hours from the grid {when}."
+        elif summary['self_consumption'] is None:
+            speech_text = f"There was no solar generation {when}, so there is no self-consumption ratio."
+        else:
+            speech_text = (
+                f"Your self-consumption {when} was {round(summary['self_consumption'] * 100)} percent, "
+                f"using {summary['generation'] - summary['grid_export']:.1f} of "
+                f"{summary['generation']:.1f} kilowatt hours of solar at home."
+            )
+
+        return build_response(speech_text, has_display=has_display)
+
+    except energy_history.PeriodError:
+        return build_response(
+            "Sorry, I didn't catch which day, week or month you meant. Which period would you like?",
+            should_end=False,
+            has_display=has_display
+        )
+
+    except energy_history.FuturePeriodError:
+        return build_response(
+            "I can only report on days that have already started.",
+            has_display=has_display
+        )
+
+    except requests.exceptions.Timeout:
+        return build_response(
+            "Sorry, the request timed out. Please try again.",
+            has_display=has_display
+        )
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return build_response(
+            "Sorry, I encountered an error retrieving your energy history.",
+            has_display=has_display
+        )
+
+
+def build_unconfigured_response(user_id, has_display=False):
+    """
+    Tell a user without credentials in the accounts mapping that the skill
+    isn't set up for them. The card shows their userId, which the operator
+    needs to add them (it changes when the skill is disabled and re-enabled).
+    """
+    response = build_response(
+        "This skill isn't set up for your household yet. "
+        "I've sent your Alexa ID to the Alexa app so you can pass it to whoever manages the skill.",
+        has_display=has_display
+    )
+    response['response']['card'] = {
+        'type': 'Simple',
+        'title': 'Battery skill not set up',
+        'content': f"Ask the skill's operator to add this ID to the accounts file:\n{user_id}"
+    }
+    return response
+
+
 def build_battery_response(speech_text, battery_percent, battery_power, solar_power,
                           grid_power, consumption_power, has_display):
     """
@@ -293,9 +842,10 @@ def get_battery_state(power):
         return '⏸️ Idle'
 
 
+@functools.lru_cache(maxsize=None)
 def get_apl_document():
     """
-    APL Document for Echo Show visual display
+    APL Document for Echo Show visual display (static, built once per container)
     """
     return {
         'type': 'APL',
@@ -488,35 +1038,99 @@ def build_response(speech_text, should_end=True, has_display=False):
             {
                 'type': 'Alexa.Presentation.APL.RenderDocument',
                 'version': '1.8',
-                'document': {
-                    'type': 'APL',
-                    'version': '1.8',
-                    'theme': 'dark',
-                    'mainTemplate': {
-                        'parameters': [],
-                        'items': [
-                            {
-                                'type': 'Container',
-                                'width': '100vw',
-                                'height': '100vh',
-                                'alignItems': 'center',
-                                'justifyContent': 'center',
-                                'items': [
-                                    {
-                                        'type': 'Text',
-                                        'text': speech_text,
-                                        'fontSize': '40dp',
-                                        'color': '#FFFFFF',
-                                        'textAlign': 'center',
-                                        'paddingLeft': '40dp',
-                                        'paddingRight': '40dp'
-                                    }
-                                ]
-                            }
-                        ]
+                'document': get_text_apl_document(),
+                'datasources': {
+                    'textData': {
+                        'text': speech_text
                     }
                 }
             }
         ]
 
-    return response
\ No newline at end of file
+    return response
+
+
+@functools.lru_cache(maxsize=None)
+def get_text_apl_document():
+    """
+    APL Document for plain text messages (static, text comes from datasources)
+    """
+    return {
+        'type': 'APL',
+        'version': '1.8',
+        'theme': 'dark',
+        'mainTemplate': {
+            'parameters': ['textData'],
+            'items': [
+                {
+                    'type': 'Container',
+                    'width': '100vw',
+                    'height': '100vh',
+                    'alignItems': 'center',
+                    'justifyContent': 'center',
+                    'items': [
+                        {
+                            'type': 'Text',
+                            'text': '${textData.text}',
+                            'fontSize': '40dp',
+                            'color': '#FFFFFF',
+                            'textAlign': 'center',
+                            'paddingLeft': '40dp',
+                            'paddingRight': '40dp'
+                        }
+                    ]
+                }
+            ]
+        }
+    }
+
+
+def get_warmup_accounts():
+    """
+    Accounts to warm up: the users in DEYE_WARMUP_USERS (comma separated
+    Alexa userIds), or the single-tenant account when none are listed
+    """
+    user_ids = [user_id.strip() for user_id in os.environ.get('DEYE_WARMUP_USERS', '').split(',') if user_id.strip()]
+    if not user_ids:
+        user_ids = [None]
+    return [account for account in map(accounts.get_user_account, user_ids) if account]
+
+
+def warm_account(account, connected):
+    """Log in and prefetch the account's station snapshot once the endpoints are ranked"""
+    connected.wait(WARMUP_BUDGET)
+    if not get_access_token(account):
+        raise RuntimeError("login failed")
+    if account.get('station_id'):
+        get_station_snapshot(account, account['station_id'])
+
+
+def warm_up():
+    """
+    Connect to the Deye endpoints, log in and prefetch station snapshots in
+    parallel during init, waiting at most DEYE_WARMUP_BUDGET_MS
+    """
+    try:
+        warm_accounts = get_warmup_accounts()
+        connected = threading.Event()
+
+        def connect():
+            try:
+                refresh_endpoints(get_api_urls())
+            finally:
+                connected.set()
+
+        tasks = [
+            ('connect', connect),
+            ('apl', lambda: (get_apl_document(), get_text_apl_document())),
+        ]
+        for number, account in enumerate(warm_accounts, 1):
+            tasks.append((f"account-{number}", functools.partial(warm_account, account, connected)))
+        return warmup.run_warmup(tasks, WARMUP_BUDGET)
+    except Exception as e:
+        print(f"Warmup error: {str(e)}")
+        return None
+
+
+if os.environ.get('DEYE_WARMUP', '').lower() in ('1', 'true', 'yes'):
+    warm_up()
@@ -0,0 +1,140 @@
+import cProfile
+import glob
+import io
+import os
+import pstats
+import re
+import time
+import tracemalloc
+
+# Opt-in profiling of single invocations.
+#
+# Enable it for every invocation with PROFILE_INVOCATIONS=1, or for one
+# request by adding "profile": true to the test event (or to the session
+# attributes). The report holds the top functions by cumulative time,
+# collapsed caller;callee stacks (flamegraph.pl / speedscope input, weighted
+# by own time in microseconds) and the top allocation sites. It is printed
+# to the log, or written to PROFILE_OUTPUT when that is a directory such as
+# /tmp. Only the calling thread is profiled.
+
+PROFILE_TOP_N = int(os.environ.get('PROFILE_TOP_N', 25))
+PROFILE_MAX_STACKS = int(os.environ.get('PROFILE_MAX_STACKS', 200))
+PROFILE_MAX_BYTES = int(os.environ.get('PROFILE_MAX_BYTES', 64 * 1024))
+PROFILE_MAX_FILES = 20
+
+
+def profiling_requested(event):
+    """Check the environment and the request for the profiling switch"""
+    if os.environ.get('PROFILE_INVOCATIONS', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if event.get('profile'):
+        return True
+    return bool(((event.get('session') or {}).get('attributes') or {}).get('profile'))
+
+
+def function_label(func):
+    """'file.py:line(name)' for a pstats function key"""
+    filename, line, name = func
+    return f"{os.path.basename(filename)}:{line}({name})" if line else name
+
+
+def top_functions(stats):
+    """Top PROFILE_TOP_N functions by cumulative time, as pstats prints them"""
+    output = io.StringIO()
+    stats.stream = output
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    return output.getvalue().strip()
+
+
+def collapsed_stacks(stats):
+    """
+    caller;callee edges weighted by the callee's own time in microseconds,
+    heaviest first. cProfile keeps one level of callers, so these are two
+    frame stacks rather than full ones.
+    """
+    lines = []
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, own_time, _) in callers.items():
+            weight = int(own_time * 1e6)
+            if weight:
+                lines.append((weight, f"{function_label(caller)};{function_label(func)} {weight}"))
+        if not callers:
+            weight = int(stats.stats[func][2] * 1e6)
+            if weight:
+                lines.append((weight, f"{function_label(func)} {weight}"))
+    lines.sort(reverse=True)
+    return '\n'.join(line for _, line in lines[:PROFILE_MAX_STACKS])
+
+
+def top_allocations(snapshot):
+    """Top PROFILE_TOP_N allocation sites still alive at the end of the invocation"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    return '\n'.join(str(stat) for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N])
+
+
+def build_report(key, elapsed_ms, profiler, snapshot, peak_bytes):
+    """Assemble the report text, truncated to PROFILE_MAX_BYTES"""
+    stats = pstats.Stats(profiler)
+    report = '\n\n'.join((
+        f"Profile {key}: {elapsed_ms:.1f} ms, peak traced memory {peak_bytes / 1024:.1f} KiB",
+        "== Top functions (cumulative) ==\n" + top_functions(stats),
+        "== Collapsed stacks (caller;callee own_us) ==\n" + collapsed_stacks(stats),
+        "== Top allocations ==\n" + top_allocations(snapshot),
+    ))
+    if len(report) > PROFILE_MAX_BYTES:
+        report = report[:PROFILE_MAX_BYTES] + "\n... truncated"
+    return report
+
+
+def write_report(report, request_id):
+    """Print the report or write it to the PROFILE_OUTPUT directory"""
+    directory = os.environ.get('PROFILE_OUTPUT', 'log')
+    if directory == 'log':
+        print(report)
+        return None
+
+    path = os.path.join(directory, f"profile-{int(time.time() * 1000)}-{request_id}.txt")
+    with open(path, 'w') as report_file:
+        report_file.write(report)
+
+    # Keep only the newest reports so /tmp doesn't fill up on long-lived containers
+    reports = sorted(glob.glob(os.path.join(directory, 'profile-*.txt')), key=os.path.getmtime)
+    for old_report in reports[:-PROFILE_MAX_FILES]:
+        os.remove(old_report)
+
+    print(f"Profile written to {path}")
+    return path
+
+
+def profiling_middleware(key, event, context, call_next):
+    """Profile the invocation with cProfile and tracemalloc when requested"""
+    if not profiling_requested(event):
+        return call_next(event, context)
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return call_next(event, context)
+    finally:
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+
+        try:
+            request_id = event.get('request', {}).get('requestId') or 'local'
+            request_id = re.sub(r'[^A-Za-z0-9-]', '', request_id.split('.')[-1])[:40]
+            write_report(build_report(key, elapsed_ms, profiler, snapshot, peak_bytes), request_id)
+        except Exception as e:
+            print(f"Profiling report error: {str(e)}")
@@ -0,0 +1,107 @@
+import time
+
+# Registry-based dispatch for Alexa requests.
+#
+# Handlers are registered per (request type, intent name) and looked up with
+# a single dict access. Middleware wraps every dispatch and is called as
+# middleware(route_key, event, context, call_next); call_next(event, context)
+# runs the rest of the chain and the handler.
+
+routes = {}
+resolvers = {}
+middleware = []
+
+# Per-route latency metrics (reused across Lambda invocations)
+route_metrics = {}
+
+
+def route(request_type, intent_names=None):
+    """
+    Decorator registering a handler(event, context) for a request type and,
+    for IntentRequest, one intent name or a tuple of them
+    """
+    if intent_names is None or isinstance(intent_names, str):
+        intent_names = (intent_names,)
+
+    def register(handler):
+        for intent_name in intent_names:
+            routes[(request_type, intent_name)] = handler
+        return handler
+    return register
+
+
+def add_resolver(request_type, resolver):
+    """
+    Register resolver(intent_name) -> handler or None, consulted for intents
+    without a route. A resolved handler is stored as a route, so each unknown
+    intent name is only resolved once per container.
+    """
+    resolvers.setdefault(request_type, []).append(resolver)
+
+
+def use(hook):
+    """Append a middleware hook; hooks run in registration order, outermost first"""
+    middleware.append(hook)
+    return hook
+
+
+def route_key(event):
+    """'RequestType' or 'RequestType/IntentName' for an event"""
+    request = event['request']
+    intent_name = request.get('intent', {}).get('name')
+    return f"{request['type']}/{intent_name}" if intent_name else request['type']
+
+
+def resolve(request_type, intent_name):
+    """Find the handler for a request, falling back to resolvers and then the type's default"""
+    handler = routes.get((request_type, intent_name))
+    if handler is not None:
+        return handler
+
+    if intent_name is not None:
+        for resolver in resolvers.get(request_type, ()):
+            handler = resolver(intent_name)
+            if handler is not None:
+                routes[(request_type, intent_name)] = handler
+                return handler
+        print(f"Unknown intent: {intent_name}")
+
+    return routes.get((request_type, None)) or routes.get((None, None))
+
+
+def dispatch(event, context):
+    """Run the middleware chain and the handler registered for the event"""
+    request = event['request']
+    handler = resolve(request['type'], request.get('intent', {}).get('name'))
+    key = route_key(event)
+
+    call_next = handler
+    for hook in reversed(middleware):
+        call_next = wrap(hook, key, call_next)
+    return call_next(event, context)
+
+
+def wrap(hook, key, call_next):
+    """Bind a middleware hook to the next link of the chain"""
+    return lambda event, context: hook(key, event, context, call_next)
+
+
+def timing_middleware(key, event, context, call_next):
+    """Record latency and error counts per route in route_metrics"""
+    start = time.perf_counter()
+    failed = True
+    try:
+        response = call_next(event, context)
+        failed = False
+        return response
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        metrics = route_metrics.setdefault(key, {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        metrics['count'] += 1
+        metrics['errors'] += failed
+        metrics['total_ms'] += elapsed_ms
+        metrics['max_ms'] = max(metrics['max_ms'], elapsed_ms)
+        print(f"Route {key}: {elapsed_ms:.1f} ms")
+
+
+use(timing_middleware)
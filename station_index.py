@@ -0,0 +1,274 @@
+import difflib
+import re
+import threading
+import time
+import unicodedata
+
+from user_cache import LRUCache
+
+# In-memory index of station and device names per account (reused across
+# Lambda invocations). Spoken names are resolved by exact normalized name,
+# then by phonetic key, and finally by fuzzy matching within a small bucket
+# of names sharing the first two characters and a similar length. Serial
+# numbers only ever match exactly.
+INDEX_TTL = 3600
+PAGE_SIZE = 100
+FUZZY_CUTOFF = 0.75
+FUZZY_MAX_CANDIDATES = 50
+ENTRY_BYTES = 1250  # approximate_size() of a 6000 entry index, per entry
+
+
+def index_size(index):
+    """Size estimate of an index from its entry count (walking all its tables takes ~80 ms)"""
+    return len(index['entries']) * ENTRY_BYTES
+
+
+index_cache = LRUCache(sizeof=index_size)
+index_lock = threading.Lock()
+
+# Words people add around a name that don't identify anything
+FILLER_WORDS = {'the', 'my', 'a', 'station', 'plant', 'system', 'device', 'inverter', 'battery', 'de', 'da', 'do'}
+
+SOUNDEX_CODES = {}
+for letters, code in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6')):
+    for letter in letters:
+        SOUNDEX_CODES[letter] = code
+
+
+def normalize_name(name):
+    """Lowercase, strip accents and punctuation, drop filler words"""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode().lower()
+    words = [word for word in re.split(r'[^a-z0-9]+', name) if word]
+    # Only drop filler words when something is left ("My Station" stays as is)
+    words = [word for word in words if word not in FILLER_WORDS] or words
+    # Spoken serial numbers arrive as separate digits ("2 3 0 1"), so glue digit runs together
+    return re.sub(r'(?<=\d) (?=\d)', '', ' '.join(words))
+
+
+def soundex(word):
+    """Classic four character Soundex code; digits are kept as-is"""
+    if word.isdigit():
+        return word
+    code = word[0]
+    last = SOUNDEX_CODES.get(word[0])
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter)
+        if digit and digit != last:
+            code += digit
+        if letter not in 'hw':
+            last = digit
+    return (code + '000')[:4]
+
+
+def phonetic_key(normalized):
+    """Soundex of every word of a normalized name"""
+    return ' '.join(soundex(word) for word in normalized.split())
+
+
+def bucket_key(normalized):
+    """Fuzzy matching bucket of a normalized name, or None for serial numbers"""
+    if normalized.replace(' ', '').isdigit():
+        return None
+    return normalized[:2], len(normalized)
+
+
+def fuzzy_candidates(index, normalized):
+    """
+    Names that could reach FUZZY_CUTOFF against normalized: same first two
+    characters and a length close enough for the ratio, nearest lengths first
+    """
+    key = bucket_key(normalized)
+    if key is None:
+        return []
+    prefix, length = key
+    # difflib's ratio is at most 2 * shorter / (both lengths), which bounds the other length
+    shortest = int(length * FUZZY_CUTOFF / (2 - FUZZY_CUTOFF))
+    longest = int(length * (2 - FUZZY_CUTOFF) / FUZZY_CUTOFF)
+    candidates = []
+    for other in sorted(range(shortest, longest + 1), key=lambda other: abs(other - length)):
+        candidates.extend(index['buckets'].get((prefix, other), ()))
+        if len(candidates) >= FUZZY_MAX_CANDIDATES:
+            return candidates[:FUZZY_MAX_CANDIDATES]
+    return candidates
+
+
+def fetch_pages(post, path, payload, list_field):
+    """Fetch every page of a Deye list endpoint"""
+    items = []
+    page = 1
+    while True:
+        result = post(path, dict(payload, page=page, size=PAGE_SIZE))
+        if result.get('code') != '1000000' and not result.get('success'):
+            raise RuntimeError(f"List error on {path}: {result.get('msg')}")
+
+        batch = result.get(list_field) or []
+        items.extend(batch)
+        if len(batch) < PAGE_SIZE or len(items) >= int(result.get('total') or 0):
+            return items
+        page += 1
+
+
+def fetch_entries(post):
+    """
+    Build index entries from the Deye station and device lists.
+    Returns {entry_key: entry} where entries map a spoken name to a station.
+    """
+    entries = {}
+    station_names = {}
+    for station in fetch_pages(post, "/v1.0/station/list", {}, 'stationList'):
+        name = station.get('name') or str(station['id'])
+        station_names[int(station['id'])] = name
+        entries[f"station:{station['id']}"] = {
+            'name': name,
+            'station_id': int(station['id']),
+            'station_name': name,
+            'device_sn': None,
+            'device_type': None
+        }
+
+    for device in fetch_pages(post, "/v1.0/device/list", {}, 'deviceList'):
+        if device.get('stationId') is None:
+            continue
+        station_id = int(device['stationId'])
+        entries[f"device:{device['deviceSn']}"] = {
+            'name': str(device['deviceSn']),
+            'station_id': station_id,
+            'station_name': station_names.get(station_id, str(station_id)),
+            'device_sn': str(device['deviceSn']),
+            'device_type': device.get('deviceType')
+        }
+    return entries
+
+
+def add_entry(index, key, entry):
+    normalized = normalize_name(entry['name'])
+    if not normalized:
+        return
+    entry['normalized'] = normalized
+    index['entries'][key] = entry
+    index['exact'].setdefault(normalized, set()).add(key)
+    index['phonetic'].setdefault(phonetic_key(normalized), set()).add(key)
+    if bucket_key(normalized):
+        index['buckets'].setdefault(bucket_key(normalized), set()).add(normalized)
+    if entry['device_sn']:
+        index['devices'].setdefault(entry['station_id'], set()).add(key)
+
+
+def remove_entry(index, key):
+    entry = index['entries'].pop(key)
+    normalized = entry['normalized']
+    for table, table_key in ((index['exact'], normalized), (index['phonetic'], phonetic_key(normalized))):
+        keys = table[table_key]
+        keys.discard(key)
+        if not keys:
+            del table[table_key]
+    if normalized not in index['exact'] and bucket_key(normalized):
+        index['buckets'][bucket_key(normalized)].discard(normalized)
+    if entry['device_sn']:
+        index['devices'][entry['station_id']].discard(key)
+
+
+def copy_index(index):
+    """Copy of an index whose tables can be changed without affecting lookups on the original"""
+    copy = {'entries': dict(index['entries']), 'loaded_at': index['loaded_at'], 'refreshing': index['refreshing']}
+    for table in ('exact', 'phonetic', 'buckets', 'devices'):
+        copy[table] = {key: set(keys) for key, keys in index[table].items()}
+    return copy
+
+
+def refresh_index(post, account):
+    """
+    Refresh an account's index from Deye, re-indexing only entries that were
+    added, renamed or removed since the last refresh. The changes are made
+    on a copy, so lookups on the current index are never disturbed.
+    """
+    fetched = fetch_entries(post)
+    with index_lock:
+        current = index_cache.get(account)
+        index = copy_index(current) if current else {
+            'entries': {}, 'exact': {}, 'phonetic': {}, 'buckets': {}, 'devices': {},
+            'loaded_at': 0, 'refreshing': False
+        }
+        changed = 0
+        for key in [key for key in index['entries'] if key not in fetched]:
+            remove_entry(index, key)
+            changed += 1
+        for key, entry in fetched.items():
+            current = index['entries'].get(key)
+            if current and all(current[field] == entry[field] for field in ('name', 'station_id', 'station_name', 'device_type')):
+                continue
+            if current:
+                remove_entry(index, key)
+            add_entry(index, key, entry)
+            changed += 1
+        index['loaded_at'] = time.time()
+        index['refreshing'] = False
+        index_cache.set(account, index)
+
+    print(f"Station index for {account}: {len(index['entries'])} entries, {changed} changed")
+    return index
+
+
+def refresh_in_background(post, account):
+    try:
+        refresh_index(post, account)
+    except Exception as e:
+        print(f"Station index refresh error: {str(e)}")
+        with index_lock:
+            index = index_cache.get(account)
+            if index:
+                index['refreshing'] = False
+
+
+def get_index(post, account):
+    """
+    Return the account's index. The first call builds it synchronously;
+    afterwards the cached index is served and refreshed in a background
+    thread once it is older than INDEX_TTL.
+    """
+    with index_lock:
+        index = index_cache.get(account)
+        stale = index is not None and time.time() - index['loaded_at'] > INDEX_TTL
+        if stale and not index['refreshing']:
+            index['refreshing'] = True
+            threading.Thread(target=refresh_in_background, args=(post, account), daemon=True).start()
+
+    if index is None:
+        index = refresh_index(post, account)
+    return index
+
+
+def lookup(index, spoken_name):
+    """
+    Resolve a spoken name against an index.
+    Returns the matching entry, or None when nothing matches unambiguously.
+    """
+    normalized = normalize_name(spoken_name)
+    if not normalized:
+        return None
+
+    keys = index['exact'].get(normalized) or index['phonetic'].get(phonetic_key(normalized))
+    if not keys:
+        close = difflib.get_close_matches(normalized, fuzzy_candidates(index, normalized), n=1, cutoff=FUZZY_CUTOFF)
+        keys = index['exact'][close[0]] if close else None
+    if not keys:
+        return None
+
+    entries = [index['entries'][key] for key in keys]
+    # Several entries can share a name (e.g. a station and its only device); they
+    # only count as a match if they all point at the same station
+    if len({entry['station_id'] for entry in entries}) > 1:
+        print(f"Ambiguous name '{spoken_name}': {[entry['name'] for entry in entries]}")
+        return None
+    return entries[0]
+
+
+def resolve_station(post, account, spoken_name):
+    """Look up a spoken station or device name for an account"""
+    return lookup(get_index(post, account), spoken_name)
+
+
+def get_station_devices(post, account, station_id):
+    """Index entries of every device that belongs to a station"""
+    index = get_index(post, account)
+    return [index['entries'][key] for key in sorted(index['devices'].get(int(station_id), ()))]
@@ -0,0 +1,69 @@
+import os
+
+from deye_simulator import start_simulator
+
+simulator = start_simulator()
+
+# A large install: one inverter and 24 battery packs on the same station
+simulator.stations = [{'id': 12345, 'name': 'Home'}, {'id': 12346, 'name': 'Workshop'}]
+simulator.devices = [{'deviceSn': '2301234567', 'deviceType': 'INVERTER', 'stationId': 12345}] + [
+    {'deviceSn': str(2400000000 + i), 'deviceType': 'BATTERY', 'stationId': 12346}
+    for i in range(24)
+]
+
+os.environ['DEYE_API_URL'] = simulator.url
+os.environ['DEYE_EMAIL'] = 'simulator@example.com'
+os.environ['DEYE_STATION_ID'] = '12345'
+
+from lambda_function import lambda_handler
+import device_telemetry
+
+
+def device_event(device):
+    return {
+        'context': {'System': {'device': {'supportedInterfaces': {}}}},
+        'request': {
+            'type': 'IntentRequest',
+            'intent': {'name': 'GetDeviceStatus', 'slots': {'device': {'name': 'device', 'value': device}}}
+        }
+    }
+
+
+def device_calls():
+    return simulator.request_log.count('/v1.0/device/latest')
+
+
+print("=" * 60)
+print("🔌 Device Telemetry Test")
+print("=" * 60)
+
+for device in ('2 3 0 1 2 3 4 5 6 7', 'workshop', 'workshop', '2 4 0 0 0 0 0 0 0 3'):
+    before = device_calls()
+    response = lambda_handler(device_event(device), None)
+    print(f"\n🎤 GetDeviceStatus ({device})")
+    print(f'   "{response["response"]["outputSpeech"]["text"]}"')
+    print(f"   device/latest calls: {device_calls() - before}")
+
+# 24 battery packs need 3 batched calls, not 24; repeats are served from cache
+if device_calls() != 4:
+    print(f"\n❌ Expected 4 device/latest calls, got {device_calls()}")
+    exit(1)
+print("\n✅ Devices fetched in batches and cached")
+
+# Placeholder values are skipped per field instead of failing the whole batch
+snapshot = device_telemetry.normalize_device({
+    'deviceSn': '2400000099',
+    'deviceType': 'BATTERY',
+    'dataList': [
+        {'key': 'SOC', 'value': 'N/A'},
+        {'key': 'BMSSOC', 'value': '64'},
+        {'key': 'BatteryPower', 'value': '--'},
+    ]
+})
+print(f"\n📋 Placeholder values: {snapshot}")
+if snapshot['battery_percent'] != 64 or snapshot['battery_power'] != 0 or not snapshot['has_battery']:
+    print("❌ Placeholder values not skipped")
+    exit(1)
+print("✅ Placeholder values skipped")
+
+print("\n" + "=" * 60)
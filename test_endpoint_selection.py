@@ -0,0 +1,91 @@
+import os
+import time
+
+from deye_simulator import start_simulator
+
+# Three local "regions" with different latencies
+slow = start_simulator(delay=0.30)
+fast = start_simulator(delay=0.01)
+medium = start_simulator(delay=0.10)
+
+os.environ['DEYE_API_URLS'] = ','.join([slow.url, fast.url, medium.url])
+os.environ['DEYE_EMAIL'] = 'simulator@example.com'
+os.environ['DEYE_STATION_ID'] = '12345'
+os.environ['DEYE_ENDPOINT_TTL'] = '1'
+
+import accounts
+import lambda_function
+
+print("=" * 60)
+print("🌍 Regional Endpoint Selection Test")
+print("=" * 60)
+print(f"\n   slow:   {slow.url}")
+print(f"   fast:   {fast.url}")
+print(f"   medium: {medium.url}")
+
+# Step 1: Probe and pick the fastest endpoint
+print("\n1️⃣ Probing candidates...")
+selected = lambda_function.select_api_url()
+print(f"   Selected: {selected}")
+if selected != fast.url:
+    print("   ❌ Expected the fast endpoint")
+    exit(1)
+print("   ✅ Fastest endpoint selected")
+
+# Step 2: Cached choice is reused without probing again
+print("\n2️⃣ Reusing cached choice...")
+start = time.monotonic()
+lambda_function.select_api_url()
+print(f"   Lookup took {(time.monotonic() - start) * 1000:.2f} ms")
+
+# Step 3: Fast endpoint goes down, requests fail over (and log in again,
+# since the token from the fast region is not valid elsewhere)
+print("\n3️⃣ Simulating outage on the fast endpoint...")
+lambda_function.get_access_token(accounts.default_account())
+fast.healthy = False
+response = lambda_function.get_battery_status(accounts.default_account())
+speech_text = response['response']['outputSpeech']['text']
+print(f'   Alexa says: "{speech_text}"')
+if 'Sorry' in speech_text:
+    print("   ❌ Request failed after failover")
+    exit(1)
+print(f"   Ranking now: {lambda_function.get_ranked_endpoints()}")
+if lambda_function.select_api_url() == fast.url:
+    print("   ❌ Failing endpoint is still preferred")
+    exit(1)
+print("   ✅ Failed over to a healthy endpoint")
+
+# Step 4: Background re-probe after the TTL picks the fast one again once it recovers
+print("\n4️⃣ Recovering fast endpoint and waiting for background re-probe...")
+fast.healthy = True
+time.sleep(1.2)
+lambda_function.select_api_url()  # Triggers the background refresh
+time.sleep(1.0)
+selected = lambda_function.select_api_url()
+print(f"   Selected: {selected}")
+if selected != fast.url:
+    print("   ❌ Expected the recovered fast endpoint")
+    exit(1)
+print("   ✅ Recovered endpoint selected again")
+
+# Step 5: Another household shares the probe, and fails over when its login is rejected
+print("\n5️⃣ Second household whose account the fast region doesn't know...")
+probes = sum(server.request_log.count('/') for server in (slow, fast, medium))
+fast.accept_logins = False
+other = dict(accounts.default_account(), key='household-2')
+response = lambda_function.get_battery_status(other)
+speech_text = response['response']['outputSpeech']['text']
+print(f'   Alexa says: "{speech_text}"')
+print(f"   Ranking for household-2: {lambda_function.get_ranked_endpoints('household-2')}")
+if 'Sorry' in speech_text:
+    print("   ❌ Rejected login was not failed over")
+    exit(1)
+if lambda_function.select_api_url('household-2') == fast.url or lambda_function.select_api_url() != fast.url:
+    print("   ❌ Rejected login should only demote the endpoint for that household")
+    exit(1)
+if sum(server.request_log.count('/') for server in (slow, fast, medium)) != probes:
+    print("   ❌ New household probed the endpoints again")
+    exit(1)
+print("   ✅ Shared probe reused, rejected login failed over for that household only")
+
+print("\n" + "=" * 60)
@@ -0,0 +1,112 @@
+import json
+import os
+from datetime import date
+
+from deye_simulator import start_simulator
+
+simulator = start_simulator()
+
+os.environ['DEYE_API_URL'] = simulator.url
+os.environ['DEYE_EMAIL'] = 'simulator@example.com'
+os.environ['DEYE_STATION_ID'] = '12345'
+
+from lambda_function import lambda_handler
+import energy_history
+
+
+def energy_event(intent_name, period=None):
+    slots = {'period': {'name': 'period', 'value': period}} if period else {}
+    return {
+        'context': {'System': {'device': {'supportedInterfaces': {}}}},
+        'request': {
+            'type': 'IntentRequest',
+            'intent': {'name': intent_name, 'slots': slots}
+        }
+    }
+
+
+def history_calls():
+    return simulator.request_log.count('/v1.0/station/history')
+
+
+print("=" * 60)
+print("📊 Energy Summary Intents Test")
+print("=" * 60)
+
+today = date.today()
+this_week = today.strftime('%G-W%V')
+this_month = today.strftime('%Y-%m')
+
+for intent_name, period in (
+    ('GetSolarGeneration', None),
+    ('GetGridImport', this_week),
+    ('GetSelfConsumption', this_month),
+    ('GetSolarGeneration', this_month),
+):
+    before = history_calls()
+    response = lambda_handler(energy_event(intent_name, period), None)
+    speech_text = response['response']['outputSpeech']['text']
+    print(f"\n🎤 {intent_name} ({period or 'today'})")
+    print(f'   "{speech_text}"')
+    print(f"   station/history calls: {history_calls() - before}")
+
+# Repeating the month should not fetch anything: completed days are cached
+# and today's totals are still fresh
+before = history_calls()
+lambda_handler(energy_event('GetSolarGeneration', this_month), None)
+if history_calls() != before:
+    print("\n❌ Cached month was fetched again")
+    exit(1)
+print("\n✅ Repeated rollup served from cache")
+
+# Unparseable dates ask again instead of failing
+response = lambda_handler(energy_event('GetSolarGeneration', '2025-02-30'), None)
+speech_text = response['response']['outputSpeech']['text']
+print("\n🎤 GetSolarGeneration (2025-02-30)")
+print(f'   "{speech_text}"')
+if response['response']['shouldEndSession']:
+    print("❌ Invalid date did not re-prompt")
+    exit(1)
+
+# Recent days Deye has no data for yet are not cached as zeros
+calls = []
+
+
+def empty_post(path, payload):
+    calls.append(path)
+    return {'success': True, 'stationDataItems': []}
+
+
+yesterday = date.fromordinal(today.toordinal() - 1)
+for _ in range(2):
+    energy_history.get_daily_rows(empty_post, 'default', '99999', yesterday, yesterday, today)
+if len(calls) != 2:
+    print("❌ Missing recent day was cached")
+    exit(1)
+print("✅ Invalid dates re-prompt, missing recent days are fetched again")
+
+# A day's partial totals are fetched again once that day has ended
+generation = [2.0]
+
+
+def growing_post(path, payload):
+    day = date.fromisoformat(payload['startAt'])
+    return {'success': True, 'stationDataItems': [
+        {'year': day.year, 'month': day.month, 'day': day.day, 'generationValue': generation[0]}
+    ]}
+
+
+energy_history.get_daily_rows(growing_post, 'default', '99998', yesterday, yesterday, yesterday)
+generation[0] = 20.0
+summary = energy_history.get_energy_summary(growing_post, 'default', '99998', yesterday.isoformat(), today)
+print(f"\n📋 {yesterday} asked during the day, then after midnight: {summary['generation']} kWh")
+if summary['generation'] != 20.0:
+    print("❌ Partial total served after the day ended")
+    exit(1)
+print("✅ Partial day refetched after midnight")
+
+summary = energy_history.get_energy_summary(lambda *args: {}, 'default', '12345', this_month)
+print("\n📋 Month rollup:")
+print(json.dumps(summary, indent=2, default=str))
+
+print("\n" + "=" * 60)
@@ -0,0 +1,90 @@
+import json
+import os
+from datetime import date
+
+from deye_simulator import start_simulator
+
+simulator = start_simulator()
+
+os.environ['DEYE_API_URL'] = simulator.url
+os.environ['DEYE_ACCOUNTS'] = json.dumps({
+    f'amzn1.ask.account.USER{i}': {
+        'email': f'household{i}@example.com',
+        'password_hash': 'simulated',
+        'station_id': 20000 + i
+    }
+    for i in range(50)
+})
+
+import energy_history
+import lambda_function
+from lambda_function import lambda_handler
+from user_cache import LRUCache
+
+
+def launch_event(user_id):
+    return {
+        'context': {
+            'System': {
+                'user': {'userId': user_id},
+                'device': {'supportedInterfaces': {}}
+            }
+        },
+        'request': {'type': 'LaunchRequest'}
+    }
+
+
+def token_calls():
+    return simulator.request_log.count('/v1.0/account/token')
+
+
+print("=" * 60)
+print("👥 Multi-Tenant Account Test")
+print("=" * 60)
+
+# Step 1: Unknown users are told the skill isn't set up and get their userId on a card
+print("\n1️⃣ Unknown user...")
+response = lambda_handler(launch_event('amzn1.ask.account.STRANGER'), None)
+print(f'   "{response["response"]["outputSpeech"]["text"]}"')
+if 'amzn1.ask.account.STRANGER' not in response['response'].get('card', {}).get('content', ''):
+    print("   ❌ Expected a card with the userId")
+    exit(1)
+print("   ✅ Not-set-up card with the userId returned")
+
+# Step 2: Each household logs in once, then reuses its cached token
+print("\n2️⃣ Ten households, two requests each...")
+for _ in range(2):
+    for i in range(10):
+        lambda_handler(launch_event(f'amzn1.ask.account.USER{i}'), None)
+print(f"   Token requests: {token_calls()}")
+if token_calls() != 10:
+    print("   ❌ Expected exactly one login per household")
+    exit(1)
+print("   ✅ One login per household")
+
+# Step 3: Bounded caches evict the least recently used households
+print("\n3️⃣ Shrinking the token cache to 5 entries...")
+lambda_function.token_cache = LRUCache(max_items=5)
+for i in range(50):
+    lambda_handler(launch_event(f'amzn1.ask.account.USER{i}'), None)
+print(f"   Token cache: {lambda_function.token_cache.stats()}")
+if len(lambda_function.token_cache) != 5:
+    print("   ❌ Token cache grew past its limit")
+    exit(1)
+print("   ✅ Cache stayed within its limit")
+
+# Step 4: Energy history is cached per household, even for the same station id
+print("\n4️⃣ Two households asking about station 12345...")
+before = simulator.request_log.count('/v1.0/station/history')
+today = date.today()
+for i in range(2):
+    account = lambda_function.accounts.get_user_account(f'amzn1.ask.account.USER{i}')
+    energy_history.get_daily_rows(lambda_function.account_post(account), account['key'], 12345, today, today, today)
+fetches = simulator.request_log.count('/v1.0/station/history') - before
+print(f"   station/history calls: {fetches}")
+if fetches != 2:
+    print("   ❌ History was shared between households")
+    exit(1)
+print("   ✅ History cached per household")
+
+print("\n" + "=" * 60)
@@ -0,0 +1,96 @@
+import os
+import random
+import time
+import timeit
+
+from deye_simulator import start_simulator
+
+simulator = start_simulator()
+
+# A large account: thousands of stations, each with an inverter (more entries
+# than fit in the index cache's share of USER_CACHE_MAX_MB)
+rng = random.Random(7)
+words = ['Beach', 'House', 'Farm', 'Barn', 'Office', 'Garage', 'Cabin', 'Lake', 'North', 'South',
+         'Workshop', 'Villa', 'Orchard', 'Mill', 'Depot', 'Casa', 'Quinta', 'Studio']
+simulator.stations = [{'id': 10000 + i, 'name': f"{rng.choice(words)} {rng.choice(words)} {i}"} for i in range(3500)]
+simulator.stations[0]['name'] = 'Beach House'
+simulator.stations[1]['name'] = 'Casa da Avó'
+simulator.devices = [
+    {'deviceSn': str(2300000000 + i), 'deviceType': 'INVERTER', 'stationId': station['id']}
+    for i, station in enumerate(simulator.stations)
+]
+
+os.environ['DEYE_API_URL'] = simulator.url
+os.environ['DEYE_EMAIL'] = 'simulator@example.com'
+os.environ['DEYE_STATION_ID'] = '12345'
+
+from lambda_function import account_post, lambda_handler, resolve_station_name
+import accounts
+import station_index
+
+account = accounts.default_account()
+
+
+def battery_event(device=None):
+    slot = {'name': 'device', 'value': device} if device else {'name': 'device'}
+    return {
+        'context': {'System': {'device': {'supportedInterfaces': {}}}},
+        'request': {
+            'type': 'IntentRequest',
+            'intent': {'name': 'GetBatteryStatus', 'slots': {'device': slot}}
+        }
+    }
+
+
+print("=" * 60)
+print("🏠 Station Name Lookup Test")
+print("=" * 60)
+
+# Step 1: Spoken names, including phonetic and fuzzy variations
+print("\n1️⃣ Resolving spoken names...")
+for spoken in ('beach house', 'the beach house', 'beech house', 'beach hose', 'beach houze', 'casa da avo',
+               '2 3 0 0 0 0 0 0 0 1', 'moon base'):
+    entry = resolve_station_name(account, spoken)
+    print(f"   '{spoken}' -> {entry and (entry['station_id'], entry['name'])}")
+
+# A misheard serial number must not fuzzy match some other device
+entry = resolve_station_name(account, '2 3 0 0 0 0 9 9 9 9')
+if entry:
+    print(f"   ❌ Unknown serial matched {entry['name']}")
+    exit(1)
+print("   ✅ Unknown serial not matched")
+
+# Step 2: Full intent round trip
+print("\n2️⃣ Asking for a named station...")
+for device in ('beach house', None, 'moon base'):
+    response = lambda_handler(battery_event(device), None)
+    print(f'   {device!r}: "{response["response"]["outputSpeech"]["text"]}"')
+
+# Step 3: Lookup latency on a warm index
+index = station_index.index_cache.get(account['key'])
+if index is None:
+    print("   ❌ Index larger than the cache budget was not kept")
+    exit(1)
+print(f"\n3️⃣ Lookup latency ({len(index['entries'])} entries)")
+for spoken in ('beach house', 'beech house', 'beach houze', 'barn farm', 'moon base'):
+    seconds = timeit.timeit(lambda: station_index.lookup(index, spoken), number=2000) / 2000
+    print(f"   '{spoken}': {seconds * 1e6:.1f} µs")
+
+# Step 4: A stale index is served while an incremental refresh runs in the background
+print("\n4️⃣ Renaming one station and refreshing...")
+simulator.stations[2]['name'] = 'Solar Shed'
+index['loaded_at'] -= station_index.INDEX_TTL + 1
+if station_index.get_index(account_post(account), account['key']) is not index:
+    print("   ❌ Stale index was not served")
+    exit(1)
+for _ in range(50):
+    if not station_index.index_cache.get(account['key'])['refreshing']:
+        break
+    time.sleep(0.1)
+entry = resolve_station_name(account, 'solar shed')
+if not entry or entry['station_id'] != simulator.stations[2]['id']:
+    print("   ❌ Renamed station not found")
+    exit(1)
+print("   ✅ Renamed station resolved")
+
+print("\n" + "=" * 60)
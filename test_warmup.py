@@ -0,0 +1,74 @@
+import os
+import time
+
+from deye_simulator import start_simulator
+
+simulator = start_simulator(delay=0.05)
+
+os.environ['DEYE_API_URL'] = simulator.url
+os.environ['DEYE_EMAIL'] = 'simulator@example.com'
+os.environ['DEYE_STATION_ID'] = '12345'
+os.environ['DEYE_WARMUP'] = '1'
+os.environ['DEYE_WARMUP_BUDGET_MS'] = '1000'
+
+print("=" * 60)
+print("🔥 Init Warmup Test")
+print("=" * 60)
+
+# Step 1: Importing the module runs the warmup, like the Lambda init phase
+print("\n1️⃣ Importing lambda_function (init phase)...")
+start = time.monotonic()
+from lambda_function import lambda_handler
+print(f"   Init took {(time.monotonic() - start) * 1000:.0f} ms")
+print(f"   Upstream calls during init: {simulator.request_log}")
+
+# Step 2: The first request is served from the warmed token and snapshot
+print("\n2️⃣ First request...")
+before = len(simulator.request_log)
+start = time.monotonic()
+response = lambda_handler({
+    'context': {'System': {'device': {'supportedInterfaces': {}}}},
+    'request': {'type': 'LaunchRequest'}
+}, None)
+print(f'   "{response["response"]["outputSpeech"]["text"]}"')
+print(f"   Took {(time.monotonic() - start) * 1000:.1f} ms, upstream calls: {len(simulator.request_log) - before}")
+if len(simulator.request_log) != before:
+    print("   ❌ First request was not served warm")
+    exit(1)
+print("   ✅ First request served warm")
+
+# Step 3: Concurrent token requests for one account log in only once
+print("\n3️⃣ Five threads asking for a token at once...")
+import threading
+import accounts
+import lambda_function
+lambda_function.token_cache.clear()
+before = simulator.request_log.count('/v1.0/account/token')
+threads = [threading.Thread(target=lambda_function.get_access_token, args=(accounts.default_account(),))
+           for _ in range(5)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+logins = simulator.request_log.count('/v1.0/account/token') - before
+print(f"   Token requests: {logins}")
+if logins != 1:
+    print("   ❌ Expected a single login")
+    exit(1)
+print("   ✅ Logins serialized per account")
+
+# Step 4: A slow upstream never holds init past the budget
+print("\n4️⃣ Warmup against a 3 second upstream with a 200 ms budget...")
+simulator.delay = 3
+lambda_function.token_cache.clear()
+lambda_function.WARMUP_BUDGET = 0.2
+start = time.monotonic()
+pending = lambda_function.warm_up()
+elapsed = time.monotonic() - start
+print(f"   Returned after {elapsed * 1000:.0f} ms, still running: {pending}")
+if elapsed > 0.5:
+    print("   ❌ Warmup exceeded its budget")
+    exit(1)
+print("   ✅ Budget respected")
+
+print("\n" + "=" * 60)
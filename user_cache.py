@@ -0,0 +1,137 @@
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+# Bounded caches for per-user state (tokens, snapshots, indexes), so one
+# deployment can serve many households without unbounded memory growth.
+#
+# USER_CACHE_MAX_MB is one budget for all caches together: each cache
+# without its own max_bytes gets an equal share. Sizes are estimates
+# (sys.getsizeof over the containers, shared objects counted once), so the
+# limit is approximate and the process itself needs memory on top of it.
+
+MAX_ITEMS = int(os.environ.get('USER_CACHE_MAX_ITEMS', 5000))
+MAX_BYTES = int(float(os.environ.get('USER_CACHE_MAX_MB', 48)) * 1024 * 1024)
+
+# Caches sharing MAX_BYTES (weak, so replaced caches stop taking a share)
+shared_caches = weakref.WeakSet()
+
+
+def approximate_size(value, seen=None):
+    """Approximate memory footprint of a cached value and everything it contains, in bytes"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(key, seen) + approximate_size(item, seen) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approximate_size(item, seen) for item in value)
+    return size
+
+
+class LRUCache:
+    """
+    Least recently used cache with optional per-entry TTL and a cap on the
+    approximate size of the stored values. Safe to share between threads.
+    Without max_bytes the cache takes its share of MAX_BYTES. sizeof can be
+    replaced by a cheaper estimate for large values that change often.
+    """
+
+    def __init__(self, max_items=MAX_ITEMS, ttl=None, max_bytes=None, sizeof=approximate_size):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.fixed_max_bytes = max_bytes
+        self.sizeof = sizeof
+        if max_bytes is None:
+            shared_caches.add(self)
+        self.entries = OrderedDict()  # key -> (value, expires_at, size)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        if self.fixed_max_bytes is not None:
+            return self.fixed_max_bytes
+        return MAX_BYTES // max(1, len(shared_caches))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it recently used, or default if missing/expired"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value, evicting the least recently used entries past the
+        item or size limits. ttl overrides the cache default for this entry.
+        The value itself is always kept, even when it alone exceeds the size
+        limit. Call again after mutating a stored value so its size is re-measured.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        size = self.sizeof(value)
+        max_bytes = self.max_bytes
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, expires_at, size)
+            self.total_bytes += size
+            while len(self.entries) > 1 and (len(self.entries) > self.max_items or self.total_bytes > max_bytes):
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+        if size > max_bytes:
+            print(f"Cache value for {key!r} (~{size / 1024 / 1024:.1f} MB) exceeds the {max_bytes / 1024 / 1024:.1f} MB "
+                  f"limit; raise USER_CACHE_MAX_MB")
+        return value
+
+    def pop(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            self._remove(key)
+            return entry[0]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        return {
+            'items': len(self.entries),
+            'bytes': self.total_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def _remove(self, key):
+        _, _, size = self.entries.pop(key)
+        self.total_bytes -= size
@@ -0,0 +1,42 @@
+import threading
+import time
+
+# Init-phase warmup. Lambda runs module import with extra CPU before the
+# first invocation, so lambda_function.py can start the slow parts of a cold
+# request (DNS, TLS, login, first snapshot) here. Tasks run in daemon
+# threads and init only waits for them up to the time budget; failures are
+# logged and never propagate.
+
+
+def run_task(name, task):
+    start = time.perf_counter()
+    try:
+        task()
+        print(f"Warmup {name}: {(time.perf_counter() - start) * 1000:.0f} ms")
+    except Exception as e:
+        print(f"Warmup {name} failed: {str(e)}")
+
+
+def run_warmup(tasks, budget):
+    """
+    Start every (name, callable) task in its own daemon thread and wait at
+    most budget seconds for them. Returns the names of tasks still running;
+    those keep going in the background and finish during the first invocation.
+    """
+    start = time.monotonic()
+    deadline = start + budget
+    threads = []
+    try:
+        for name, task in tasks:
+            thread = threading.Thread(target=run_task, args=(name, task), name=f"warmup-{name}", daemon=True)
+            thread.start()
+            threads.append((name, thread))
+
+        for _, thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+    except Exception as e:
+        print(f"Warmup error: {str(e)}")
+
+    pending = [name for name, thread in threads if thread.is_alive()]
+    print(f"Warmup done in {(time.monotonic() - start) * 1000:.0f} ms, still running: {pending or 'none'}")
+    return pending